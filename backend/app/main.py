@@ -7,13 +7,13 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from .routers import chat
-from .services.graphrag import GraphRAGConfig, GraphRAGService, StubGraphRAGChatEngine
+from .services.graphrag import ChatEngine, GraphRAGConfig, GraphRAGService
 from .services.ingestion import DataDirectoryIngestor
 
 LOGGER = logging.getLogger(__name__)
 
 
-def create_app(*, base_path: Path | None = None, engine: GraphRAGService | StubGraphRAGChatEngine | None = None) -> FastAPI:
+def create_app(*, base_path: Path | None = None, engine: ChatEngine | None = None) -> FastAPI:
     """Application factory used by both production and tests."""
 
     resolved_base = base_path or Path(__file__).resolve().parents[2]
@@ -45,4 +45,19 @@ def create_app(*, base_path: Path | None = None, engine: GraphRAGService | StubG
     return app
 
 
-app = create_app()
+_app: FastAPI | None = None
+
+
+def __getattr__(name: str) -> FastAPI:
+    """Build the production ``app`` on first access (e.g. by uvicorn).
+
+    Importing ``create_app`` alone, as the tests do, no longer constructs a second
+    application and its GraphRAG backend as an import side effect.
+    """
+
+    global _app
+    if name != "app":
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    if _app is None:
+        _app = create_app()
+    return _app
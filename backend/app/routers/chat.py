@@ -1,24 +1,33 @@
 from __future__ import annotations
 
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
 from fastapi import APIRouter, Depends, File, HTTPException, Request, UploadFile
-from fastapi.responses import StreamingResponse
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
 
-from ..services.graphrag import (
-    GraphRAGConfigurationError,
-    GraphRAGService,
-    StubGraphRAGChatEngine,
-)
+from ..services.graphrag import ChatEngine, GraphRAGConfigurationError
 from ..services.ingestion import DataDirectoryIngestor
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
+# Ask reverse proxies (nginx et al.) and clients not to buffer the stream so
+# chunks reach the browser as soon as they are produced.
+STREAM_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+# Ingestion can block for a long time on document parsing, LLM extraction and
+# FalkorDB writes; run it on a dedicated thread so it cannot starve the
+# threadpool FastAPI uses for other sync work. A single worker also queues
+# concurrent ingests, which share the engine state and the URL cache on disk.
+INGEST_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ingest")
+
 
 class ChatRequest(BaseModel):
     prompt: str
 
 
-def get_engine(request: Request) -> GraphRAGService | StubGraphRAGChatEngine:
+def get_engine(request: Request) -> ChatEngine:
     return request.app.state.engine  # type: ignore[attr-defined]
 
 
@@ -26,30 +35,30 @@ def get_ingestor(request: Request) -> DataDirectoryIngestor:
     return request.app.state.ingestor  # type: ignore[attr-defined]
 
 
-@router.post("/ingest")
-def ingest_documents(
-    ingestor: DataDirectoryIngestor = Depends(get_ingestor),
-    engine: GraphRAGService | StubGraphRAGChatEngine = Depends(get_engine),
-) -> dict:
+def _run_ingest(ingestor: DataDirectoryIngestor, engine: ChatEngine) -> dict:
     documents = ingestor.collect_documents()
     if not documents:
         raise HTTPException(status_code=404, detail="No documents found for ingestion")
 
-    if isinstance(engine, GraphRAGService):
-        try:
+    try:
+        # Ingest is incremental, so unchanged documents keep their graph, ontology
+        # and chat session. Only a full rebuild can drop documents whose files
+        # have been removed since the last ingest.
+        collected = {doc.name for doc in documents}
+        if any(doc.name not in collected for doc in engine.get_documents()):
             engine.reset()
-            result = engine.ingest(documents)
-        except GraphRAGConfigurationError as exc:
-            raise HTTPException(status_code=500, detail=str(exc)) from exc
-    else:
-        engine.reset()
-        result = engine.ingest(documents)
-        result["using_stub"] = True
-        result["graph_name"] = None
-        result["ontology_path"] = None
-        result["ontology_refreshed"] = False
-        result["document_names"] = [doc.name for doc in documents]
-    return result
+        return engine.ingest(documents)
+    except GraphRAGConfigurationError as exc:
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+
+
+@router.post("/ingest")
+async def ingest_documents(
+    ingestor: DataDirectoryIngestor = Depends(get_ingestor),
+    engine: ChatEngine = Depends(get_engine),
+) -> dict:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(INGEST_EXECUTOR, _run_ingest, ingestor, engine)
 
 
 @router.post("/upload")
@@ -57,34 +66,19 @@ async def upload_document(
     file: UploadFile = File(...),
     ingestor: DataDirectoryIngestor = Depends(get_ingestor),
 ) -> dict:
-    contents = await file.read()
-    saved_path = ingestor.persist_upload(file.filename, contents)
+    # UploadFile wraps a SpooledTemporaryFile; copy it to disk off the event loop.
+    saved_path = await asyncio.to_thread(ingestor.stream_upload, file.filename, file.file)
     return {"filename": file.filename, "stored_at": str(saved_path)}
 
 
 @router.get("/documents")
-def list_documents(engine: GraphRAGService | StubGraphRAGChatEngine = Depends(get_engine)) -> dict:
-    documents = engine.get_documents()
-    payload = {
-        "documents": [
-            {
-                "name": doc.name,
-                "metadata": doc.metadata,
-            }
-            for doc in documents
-        ]
-    }
-    if isinstance(engine, GraphRAGService):
-        payload["using_stub"] = engine.using_stub
-    else:
-        payload["using_stub"] = True
-    return payload
+def list_documents(engine: ChatEngine = Depends(get_engine)) -> Response:
+    # The engine keeps the serialised listing until the next ingest or reset.
+    return Response(content=engine.document_listing(), media_type="application/json")
 
 
 @router.post("/stream")
-async def chat(
-    request: ChatRequest, engine: GraphRAGService | StubGraphRAGChatEngine = Depends(get_engine)
-) -> StreamingResponse:
+async def chat(request: ChatRequest, engine: ChatEngine = Depends(get_engine)) -> StreamingResponse:
 
     async def response_generator():
         try:
@@ -93,4 +87,4 @@ async def chat(
         except GraphRAGConfigurationError as exc:
             raise HTTPException(status_code=500, detail=str(exc)) from exc
 
-    return StreamingResponse(response_generator(), media_type="text/plain")
+    return StreamingResponse(response_generator(), media_type="text/plain", headers=STREAM_HEADERS)
@@ -0,0 +1,97 @@
+"""Text extraction and hashing for local files.
+
+Kept free of the GraphRAG imports so the worker processes used for PDF
+parsing start quickly.
+"""
+from __future__ import annotations
+
+import hashlib
+import io
+import logging
+from pathlib import Path
+
+try:  # pragma: no cover - optional fast path
+    import pypdfium2 as pdfium  # type: ignore
+except Exception:  # pragma: no cover - falls back to pypdf
+    pdfium = None
+
+try:  # pragma: no cover - optional fast path
+    from blake3 import blake3  # type: ignore
+except Exception:  # pragma: no cover - falls back to hashlib.sha1
+    blake3 = None
+
+HAS_PDFIUM = pdfium is not None
+
+# Content hashes only fingerprint documents for provenance and change
+# detection, so a fast non-legacy hash is used whenever it is installed.
+HASH_ALGORITHM = "blake3" if blake3 is not None else "sha1"
+
+LOGGER = logging.getLogger(__name__)
+
+
+def _content_hash(data: bytes) -> str:
+    if blake3 is not None:
+        return blake3(data).hexdigest(length=16)
+    return hashlib.sha1(data).hexdigest()
+
+
+def _extract_pdf_text(path: Path, data: bytes) -> str:
+    if pdfium is not None:
+        return _extract_pdf_text_pdfium(data)
+
+    try:
+        from pypdf import PdfReader  # type: ignore
+    except Exception:  # pragma: no cover - optional dependency
+        LOGGER.warning("Neither pypdfium2 nor pypdf available, returning placeholder text for %s", path)
+        return f"PDF document at {path.name}"
+
+    # Pages are appended to one growing buffer rather than kept as a list and
+    # joined, so the full text is not held twice at the end.
+    content = io.StringIO()
+    reader = PdfReader(io.BytesIO(data))
+    for page in reader.pages:
+        try:
+            page_text = page.extract_text() or ""
+        except Exception:  # pragma: no cover - defensive
+            page_text = ""
+        content.write(page_text)
+        content.write("\n")
+    return content.getvalue().strip()
+
+
+def _extract_pdf_text_pdfium(data: bytes) -> str:
+    content = io.StringIO()
+    pdf = pdfium.PdfDocument(data)
+    try:
+        for page in pdf:
+            textpage = page.get_textpage()
+            try:
+                # PDFium separates lines with CRLF; normalise to match pypdf.
+                content.write(textpage.get_text_range().replace("\r\n", "\n"))
+                content.write("\n")
+            finally:
+                textpage.close()
+                page.close()
+    finally:
+        pdf.close()
+    return content.getvalue().strip()
+
+
+def _decode_text(data: bytes) -> str:
+    text = data.decode("utf-8")
+    # Match Path.read_text's universal-newline handling.
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+def _read_local_file(path: Path, source: str) -> tuple[str, str]:
+    """Return ``(content, hash)`` for a local file.
+
+    Module-level so it can be shipped to worker processes. The file is read
+    once and the same bytes feed both the parser and the hash.
+    """
+
+    raw = path.read_bytes()
+    content = _extract_pdf_text(path, raw) if source == "pdf" else _decode_text(raw)
+    return content, _content_hash(raw)
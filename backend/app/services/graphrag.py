@@ -2,18 +2,44 @@
 from __future__ import annotations
 
 import asyncio
+import functools
+import hashlib
+import heapq
 import json
 import logging
 import os
+import re
+import sys
 import threading
+from collections import Counter, deque
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import AsyncGenerator, Dict, Iterable, List, Optional
+from typing import AsyncGenerator, Dict, Iterable, List, Optional, Protocol, Union
 
+import httpx
 from dotenv import load_dotenv
 
+try:  # pragma: no cover - optional speed-up
+    import orjson
+except ImportError:  # pragma: no cover - stdlib fallback
+    orjson = None  # type: ignore[assignment]
+
 LOGGER = logging.getLogger(__name__)
 
+STUB_STREAM_CHUNK_SIZE = 512
+STUB_CHAT_HISTORY_LIMIT = 256
+# Prompt tokens at least this long also match indexed tokens they prefix.
+MIN_PREFIX_MATCH_LENGTH = 3
+# Incremental ingests only trigger an automatic ontology rebuild when the new
+# documents make up more than this share of the already ingested corpus.
+ONTOLOGY_REFRESH_DELTA_RATIO = 0.2
+# Ollama unloads an idle model after five minutes by default; a negative
+# keep_alive holds the warmed model until the first question arrives.
+OLLAMA_WARMUP_KEEP_ALIVE = -1
+# Shared by the stub index and stub queries so they agree on what a token is.
+# ``\w`` keeps non-ASCII words searchable.
+_TOKEN_RE = re.compile(r"\w+")
+
 try:  # pragma: no cover - exercised in integration environments
     from graphrag_sdk import KnowledgeGraph, Ontology
     from graphrag_sdk.model_config import KnowledgeGraphModelConfig
@@ -39,6 +65,18 @@ class GraphRAGConfigurationError(RuntimeError):
     """Raised when the production GraphRAG backend cannot be initialised."""
 
 
+_DEFAULT_DOTENV_LOADED = False
+
+
+def _load_default_dotenv() -> None:
+    """Load the nearest .env file once per process."""
+    global _DEFAULT_DOTENV_LOADED
+    if _DEFAULT_DOTENV_LOADED:
+        return
+    load_dotenv(override=False)
+    _DEFAULT_DOTENV_LOADED = True
+
+
 def _mask_secret(value: Optional[str], visible: int = 4) -> str:
     """Mask sensitive values while still indicating presence."""
     if not value:
@@ -48,6 +86,29 @@ def _mask_secret(value: Optional[str], visible: int = 4) -> str:
     return f"{value[:visible]}***{value[-visible:]}"
 
 
+def _dump_json(payload: object) -> bytes:
+    """Serialise ``payload`` to compact JSON bytes, preferring orjson when installed."""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+
+def _load_json(data: Union[str, bytes]) -> object:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _tokenize(text: str) -> List[str]:
+    """Split ``text`` into lowercase word tokens."""
+    return _TOKEN_RE.findall(text.lower())
+
+
+def _fingerprint(data: bytes) -> str:
+    """Cheap content fingerprint used to detect unchanged ontologies and documents."""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
 @dataclass
 class Document:
     """Simple representation of an ingested document."""
@@ -57,7 +118,19 @@ class Document:
     metadata: Dict[str, str] = field(default_factory=dict)
 
 
-@dataclass
+def _document_digest(document: Document) -> str:
+    # Ingested files already carry a hash of their raw bytes; reuse it rather
+    # than re-encoding the whole text to fingerprint it again.
+    return document.metadata.get("hash") or _fingerprint(document.content.encode("utf-8"))
+
+
+def _document_listing(documents: Iterable[Document], *, using_stub: bool) -> bytes:
+    """Serialise the ``GET /chat/documents`` payload."""
+    listing = [{"name": doc.name, "metadata": doc.metadata} for doc in documents]
+    return _dump_json({"documents": listing, "using_stub": using_stub})
+
+
+@dataclass(frozen=True)
 class GraphRAGConfig:
     """Configuration values required for a GraphRAG service instance."""
 
@@ -83,12 +156,16 @@ class GraphRAGConfig:
         return value.lower() in {"1", "true", "yes", "on"}
 
     @classmethod
+    @functools.lru_cache(maxsize=None)
     def from_env(cls, base_path: Path) -> "GraphRAGConfig":
-        """Load configuration from the environment and optional .env file."""
+        """Load configuration from the environment and optional .env file.
+
+        Results are memoised per ``base_path``; call ``GraphRAGConfig.from_env.cache_clear()``
+        to pick up environment changes made after the first call.
+        """
 
-        env_path = base_path / ".env"
-        load_dotenv(env_path, override=True)
-        load_dotenv(override=True)
+        load_dotenv(base_path / ".env", override=False)
+        _load_default_dotenv()
 
         def env(name: str, default: Optional[str] = None) -> Optional[str]:
             return os.getenv(name, default)
@@ -127,27 +204,141 @@ class GraphRAGConfig:
         )
 
 
+class ChatEngine(Protocol):
+    """Interface shared by :class:`GraphRAGService` and :class:`StubGraphRAGChatEngine`."""
+
+    @property
+    def using_stub(self) -> bool: ...
+
+    def ingest(self, documents: Iterable[Document]) -> Dict[str, object]: ...
+
+    def get_documents(self) -> List[Document]: ...
+
+    def document_listing(self) -> bytes: ...
+
+    def stream_chat(self, prompt: str) -> AsyncGenerator[bytes, None]: ...
+
+    def reset(self) -> None: ...
+
+
+@dataclass
+class _TrieNode:
+    children: Dict[str, "_TrieNode"] = field(default_factory=dict)
+    terminal: bool = False
+
+
+class _TokenTrie:
+    """Character trie over indexed tokens, used to expand prompt prefixes."""
+
+    def __init__(self) -> None:
+        self._root = _TrieNode()
+
+    def add(self, token: str) -> None:
+        node = self._root
+        for char in token:
+            node = node.children.setdefault(char, _TrieNode())
+        node.terminal = True
+
+    def discard(self, token: str) -> None:
+        path = [self._root]
+        for char in token:
+            node = path[-1].children.get(char)
+            if node is None:
+                return
+            path.append(node)
+        path[-1].terminal = False
+        # Prune the branch back up to the last node still in use.
+        for depth in range(len(token), 0, -1):
+            node = path[depth]
+            if node.terminal or node.children:
+                break
+            del path[depth - 1].children[token[depth - 1]]
+
+    def complete(self, prefix: str) -> List[str]:
+        """Return every indexed token starting with ``prefix`` (including itself)."""
+
+        node = self._root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return []
+
+        matches: List[str] = []
+        stack = [(node, prefix)]
+        while stack:
+            node, text = stack.pop()
+            if node.terminal:
+                matches.append(sys.intern(text))
+            stack.extend((child, text + char) for char, child in list(node.children.items()))
+        return matches
+
+    def clear(self) -> None:
+        self._root = _TrieNode()
+
+
 class StubGraphRAGChatEngine:
     """Tiny in-memory chat engine that mimics GraphRAG behaviour for tests."""
 
+    using_stub = True
+    graph_name: Optional[str] = None
+    ontology_path: Optional[str] = None
+
     def __init__(self) -> None:
         self._documents: Dict[str, Document] = {}
-        self._chat_history: List[Dict[str, str]] = []
+        self._chat_history: deque[Dict[str, str]] = deque(maxlen=STUB_CHAT_HISTORY_LIMIT)
+        # Documents get a small integer id in first-ingest order; postings are
+        # keyed by it so scoring hashes ints rather than names, and ties rank
+        # by id without walking the whole store.
+        self._doc_ids: Dict[str, int] = {}
+        self._docs_by_id: Dict[int, Document] = {}
+        # Lowercase token counts per document plus an inverted
+        # token -> {doc id: term frequency} index, built once at ingest so chat
+        # turns never rescan content.
+        self._token_index: Dict[int, Counter[str]] = {}
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._trie = _TokenTrie()
+        self._snippets: Dict[str, str] = {}
+        self._listing_cache: Optional[bytes] = None
+        self._available_names: Optional[str] = None
 
-    def ingest(self, documents: Iterable[Document]) -> Dict[str, int]:
+    def ingest(self, documents: Iterable[Document]) -> Dict[str, object]:
         """Add the provided documents to the in-memory store."""
 
-        added = 0
+        names: List[str] = []
         for doc in documents:
+            doc_id = self._doc_ids.get(doc.name)
+            if doc_id is None:
+                doc_id = self._doc_ids[doc.name] = len(self._doc_ids)
+            else:
+                self._unindex(doc_id)
             self._documents[doc.name] = doc
-            added += 1
-        return {"documents_ingested": added, "total_documents": len(self._documents)}
+            self._docs_by_id[doc_id] = doc
+            self._index(doc_id, doc)
+            names.append(doc.name)
+        self._listing_cache = None
+        self._available_names = None
+        return {
+            "documents_ingested": len(names),
+            "documents_added": len(names),
+            "total_documents": len(self._documents),
+            "graph_name": self.graph_name,
+            "ontology_path": self.ontology_path,
+            "ontology_refreshed": False,
+            "using_stub": True,
+            "document_names": names,
+        }
 
     def get_documents(self) -> List[Document]:
         return list(self._documents.values())
 
-    async def stream_chat(self, prompt: str) -> AsyncGenerator[str, None]:
-        """Generate a deterministic response for the supplied prompt."""
+    def document_listing(self) -> bytes:
+        """Return the serialised document listing; cached until the next ingest or reset."""
+        if self._listing_cache is None:
+            self._listing_cache = _document_listing(self._documents.values(), using_stub=True)
+        return self._listing_cache
+
+    async def stream_chat(self, prompt: str) -> AsyncGenerator[bytes, None]:
+        """Generate a deterministic response for the supplied prompt as UTF-8 bytes."""
 
         self._chat_history.append({"role": "user", "content": prompt})
 
@@ -155,46 +346,106 @@ class StubGraphRAGChatEngine:
         answer = self._render_answer(prompt, highlights)
         self._chat_history.append({"role": "assistant", "content": answer})
 
-        for chunk in answer.split():
-            await asyncio.sleep(0)
-            yield chunk + " "
+        # The answer is computed up front, so encode it once and emit fixed-size
+        # byte slices rather than paying an event-loop round-trip per word.
+        # Slices may split a multi-byte character; clients decode the stream
+        # incrementally. Long answers still yield to the loop once per slice so
+        # other requests progress.
+        payload = answer.encode("utf-8")
+        for start in range(0, len(payload), STUB_STREAM_CHUNK_SIZE):
+            if start:
+                await asyncio.sleep(0)
+            yield payload[start : start + STUB_STREAM_CHUNK_SIZE]
 
     def reset(self) -> None:
         self._documents.clear()
         self._chat_history.clear()
+        self._doc_ids.clear()
+        self._docs_by_id.clear()
+        self._token_index.clear()
+        self._postings.clear()
+        self._trie.clear()
+        self._snippets.clear()
+        self._listing_cache = None
+        self._available_names = None
 
     # Internal helpers -------------------------------------------------
+    def _index(self, doc_id: int, document: Document) -> None:
+        # Tokens are interned so every document, posting list and query shares
+        # one string object per term, turning key comparisons into identity checks.
+        counts: Counter[str] = Counter()
+        for token, frequency in Counter(_tokenize(document.content)).items():
+            token = sys.intern(token)
+            counts[token] = frequency
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                self._trie.add(token)
+            postings[doc_id] = frequency
+        self._token_index[doc_id] = counts
+        lines = document.content.strip().splitlines()[0:2]
+        self._snippets[document.name] = " / ".join(part.strip() for part in lines if part.strip())
+
+    def _unindex(self, doc_id: int) -> None:
+        for token in self._token_index.pop(doc_id, ()):
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[token]
+                self._trie.discard(token)
+
     def _build_highlights(self, prompt: str) -> List[tuple[Document, int]]:
-        """Return documents ranked by lexical overlap with the prompt."""
+        """Return documents ranked by the summed term frequency of the prompt tokens."""
 
-        tokens = {token.lower() for token in prompt.split() if token}
+        tokens = {sys.intern(token) for token in _tokenize(prompt)}
         if not tokens or not self._documents:
             return []
 
-        ranked: List[tuple[Document, int]] = []
-        for document in self._documents.values():
-            score = sum(1 for token in tokens if token in document.content.lower())
-            if score:
-                ranked.append((document, score))
-
-        ranked.sort(key=lambda item: item[1], reverse=True)
-        return ranked[:3]
+        # Resolve the prompt to a set of indexed terms first, so a term reached
+        # from several prompt tokens is only counted once, then sum their
+        # posting lists. Only those lists are visited, so the cost scales with
+        # their size rather than with the corpus.
+        terms: set[str] = set()
+        for token in tokens:
+            if len(token) >= MIN_PREFIX_MATCH_LENGTH:
+                terms.update(self._trie.complete(token))
+            elif token in self._postings:
+                terms.add(token)
+
+        # /chat/ingest re-indexes on a worker thread while chats run on the
+        # event loop, so terms and documents may vanish mid-query: read through
+        # .get() and copies rather than iterating live dicts.
+        scores: Counter[int] = Counter()
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings:
+                scores.update(postings.copy())
+
+        # Only the top three are shown, so select them with a bounded heap
+        # instead of sorting every scored document. Lower ids were ingested
+        # first, which keeps tie-breaking stable.
+        ranked = heapq.nsmallest(3, scores.items(), key=lambda item: (-item[1], item[0]))
+        highlights = []
+        for doc_id, score in ranked:
+            document = self._docs_by_id.get(doc_id)
+            if document is not None:
+                highlights.append((document, score))
+        return highlights
 
     def _render_answer(self, prompt: str, highlights: List[tuple[Document, int]]) -> str:
         if not self._documents:
             return "No knowledge available yet. Please ingest documents and try again."
 
         if not highlights:
-            available = ", ".join(doc.name for doc in self._documents.values())
-            return f"No direct match found for '{prompt}'. Available documents: {available}."
-
-        summary_lines = []
-        for document, score in highlights:
-            snippet = document.content.strip().splitlines()[0:2]
-            excerpt = " / ".join(part.strip() for part in snippet if part.strip())
-            summary_lines.append(f"{document.name} (score {score}): {excerpt}")
+            if self._available_names is None:
+                self._available_names = ", ".join(self._documents)
+            return f"No direct match found for '{prompt}'. Available documents: {self._available_names}."
 
-        summary = " | ".join(summary_lines)
+        summary = " | ".join(
+            f"{document.name} (score {score}): {self._snippets.get(document.name, '')}" for document, score in highlights
+        )
         return f"Prompt: {prompt}\nTop sources: {summary}"
 
 
@@ -206,11 +457,18 @@ class GraphRAGService:
         self.config.ontology_path.parent.mkdir(parents=True, exist_ok=True)
 
         self._documents: Dict[str, Document] = {}
+        # Content digest of every ingested document, by name.
+        self._ingested_digests: Dict[str, str] = {}
+        self._listing_cache: Optional[bytes] = None
         self._last_ingest_summary: Dict[str, object] = {}
         self._knowledge_graph: Optional[KnowledgeGraph] = None
         self._chat_session = None
         self._model_config: Optional[KnowledgeGraphModelConfig] = None
         self._ontology: Optional[Ontology] = None
+        self._ontology_digest: Optional[str] = None
+        # Set when start-up connected to a graph persisted by an earlier process,
+        # whose contents this instance has no record of.
+        self._inherited_graph = False
 
         self._using_stub = force_stub if force_stub is not None else config.force_stub
 
@@ -228,6 +486,8 @@ class GraphRAGService:
             LOGGER.warning("GraphRAG initialisation failed (%s); falling back to stub backend", exc)
             self._engine = StubGraphRAGChatEngine()
             self._using_stub = True
+            return
+        self._inherited_graph = self._knowledge_graph is not None
 
     # ------------------------------------------------------------------
     @property
@@ -239,15 +499,6 @@ class GraphRAGService:
 
         if self._using_stub:
             summary = self._engine.ingest(documents)
-            summary.update(
-                {
-                    "using_stub": True,
-                    "graph_name": None,
-                    "ontology_path": None,
-                    "ontology_refreshed": False,
-                }
-            )
-            summary["document_names"] = [doc.name for doc in documents]
             self._last_ingest_summary = summary
             return summary
 
@@ -255,27 +506,56 @@ class GraphRAGService:
             raise GraphRAGConfigurationError("Model configuration not available")
 
         if not documents:
-            summary = {
-                "documents_ingested": 0,
-                "total_documents": len(self._documents),
-                "graph_name": self.config.kg_name,
-                "ontology_path": str(self.config.ontology_path),
-                "ontology_refreshed": False,
-                "using_stub": False,
-                "document_names": [],
-            }
+            summary = self._ingest_summary([], documents_added=0, ontology_refreshed=False)
             self._last_ingest_summary = summary
             return summary
 
-        if self.config.reset_before_ingest:
+        # Documents ingested by an earlier process (including files deleted since)
+        # cannot be told apart from new ones, so the first ingest starts over.
+        if self.config.reset_before_ingest or self._inherited_graph:
             self.reset()
 
-        sources = [self._build_source(doc) for doc in documents]
+        # A single pass fingerprints every document, records its name, spots
+        # changed documents and picks out the ones not yet in the graph.
+        names: List[str] = []
+        new_documents: List[Document] = []
+        new_digests: Dict[str, str] = {}
+        changed = False
+        for doc in documents:
+            names.append(doc.name)
+            digest = _document_digest(doc)
+            known = self._ingested_digests.get(doc.name)
+            if known is not None:
+                changed = changed or known != digest
+            elif doc.name not in new_digests:
+                new_documents.append(doc)
+                new_digests[doc.name] = digest
+
+        # The graph cannot forget what an earlier version of a document said, so
+        # a changed document means rebuilding from scratch with every document.
+        if changed:
+            LOGGER.info("Ingested documents changed on disk; resetting the knowledge graph")
+            self.reset()
+            new_documents.clear()
+            new_digests.clear()
+            for doc in documents:
+                if doc.name not in new_digests:
+                    new_documents.append(doc)
+                    new_digests[doc.name] = _document_digest(doc)
+
+        if not new_documents:
+            summary = self._ingest_summary(names, documents_added=0, ontology_refreshed=False)
+            self._last_ingest_summary = summary
+            return summary
+
+        sources = [self._build_source(doc) for doc in new_documents]
 
         ontology_refreshed = False
         ensure_knowledge_graph = self._knowledge_graph is None
+        delta_ratio = len(new_documents) / max(1, len(self._documents))
+        refresh_ontology = self.config.auto_refresh_ontology and delta_ratio > ONTOLOGY_REFRESH_DELTA_RATIO
 
-        if ensure_knowledge_graph or self.config.auto_refresh_ontology or self._ontology is None:
+        if ensure_knowledge_graph or refresh_ontology or self._ontology is None:
             self._ontology = self._build_ontology(sources)
             ontology_refreshed = True
 
@@ -294,18 +574,19 @@ class GraphRAGService:
         except Exception as exc:  # pragma: no cover - depends on external services
             raise GraphRAGConfigurationError(f"Failed to process sources: {exc}") from exc
 
-        self._documents = {doc.name: doc for doc in documents}
-        self._chat_session = self._knowledge_graph.chat_session()
-
-        summary = {
-            "documents_ingested": len(documents),
-            "total_documents": len(self._documents),
-            "graph_name": self.config.kg_name,
-            "ontology_path": str(self.config.ontology_path),
-            "ontology_refreshed": ontology_refreshed,
-            "using_stub": False,
-            "document_names": [doc.name for doc in documents],
-        }
+        for doc in new_documents:
+            self._documents[doc.name] = doc
+        self._ingested_digests.update(new_digests)
+        self._listing_cache = None
+        # A session queries the live graph, so it only needs replacing when the
+        # ontology it generates Cypher against has changed (or after a reset).
+        if ontology_refreshed or self._chat_session is None:
+            self._chat_session = self._knowledge_graph.chat_session()
+            self._warm_qa_model()
+
+        summary = self._ingest_summary(
+            names, documents_added=len(new_documents), ontology_refreshed=ontology_refreshed
+        )
         self._last_ingest_summary = summary
         return summary
 
@@ -314,7 +595,15 @@ class GraphRAGService:
             return self._engine.get_documents()
         return list(self._documents.values())
 
-    async def stream_chat(self, prompt: str) -> AsyncGenerator[str, None]:
+    def document_listing(self) -> bytes:
+        """Return the serialised document listing; cached until the next ingest or reset."""
+        if self._using_stub:
+            return self._engine.document_listing()
+        if self._listing_cache is None:
+            self._listing_cache = _document_listing(self._documents.values(), using_stub=False)
+        return self._listing_cache
+
+    async def stream_chat(self, prompt: str) -> AsyncGenerator[bytes, None]:
         if self._using_stub:
             async for chunk in self._engine.stream_chat(prompt):
                 yield chunk
@@ -324,17 +613,20 @@ class GraphRAGService:
             raise GraphRAGConfigurationError("No active chat session. Ingest documents first.")
 
         loop = asyncio.get_running_loop()
-        queue: asyncio.Queue[Optional[str]] = asyncio.Queue()
+        # Unbounded, so put_nowait never blocks; back-pressure comes from the
+        # model's own token rate.
+        queue: asyncio.Queue[Optional[bytes]] = asyncio.Queue()
         error: List[Exception] = []
 
         def worker() -> None:
             try:
                 for chunk in self._chat_session.send_message_stream(prompt):  # type: ignore[attr-defined]
-                    asyncio.run_coroutine_threadsafe(queue.put(chunk), loop).result()
+                    # Encode on the worker thread so the event loop only forwards bytes.
+                    loop.call_soon_threadsafe(queue.put_nowait, chunk.encode("utf-8"))
             except Exception as exc:  # pragma: no cover - relies on backend availability
                 error.append(exc)
             finally:
-                asyncio.run_coroutine_threadsafe(queue.put(None), loop).result()
+                loop.call_soon_threadsafe(queue.put_nowait, None)
 
         threading.Thread(target=worker, daemon=True).start()
 
@@ -358,9 +650,25 @@ class GraphRAGService:
             except Exception as exc:  # pragma: no cover - relies on backend availability
                 LOGGER.warning("Failed to delete knowledge graph: %s", exc)
 
+        self._listing_cache = None
+        self._inherited_graph = False
         self._initialise_real_backend()
 
     # Internal helpers -------------------------------------------------
+    def _ingest_summary(
+        self, names: List[str], *, documents_added: int, ontology_refreshed: bool
+    ) -> Dict[str, object]:
+        return {
+            "documents_ingested": len(names),
+            "documents_added": documents_added,
+            "total_documents": len(self._documents),
+            "graph_name": self.config.kg_name,
+            "ontology_path": str(self.config.ontology_path),
+            "ontology_refreshed": ontology_refreshed,
+            "using_stub": False,
+            "document_names": names,
+        }
+
     def _initialise_real_backend(self) -> None:
         if not HAS_GRAPH_BACKEND:
             raise GraphRAGConfigurationError("graphrag_sdk is not installed")
@@ -397,6 +705,7 @@ class GraphRAGService:
             self._ontology = None
             self._chat_session = None
             self._documents.clear()
+            self._ingested_digests.clear()
             return
 
         self._create_knowledge_graph(ontology)
@@ -420,6 +729,32 @@ class GraphRAGService:
         self._ontology = self._knowledge_graph.ontology or ontology
         self._chat_session = None
         self._documents.clear()
+        self._ingested_digests.clear()
+
+    def _warm_qa_model(self) -> None:
+        """Load the Ollama QA model in the background ahead of the first question.
+
+        Retrieval and generation run back to back inside ``send_message_stream``,
+        so the cold model load cannot be overlapped per request; doing it when a
+        session is created hides it behind the time the user spends typing.
+        The warm-up pins the model with ``OLLAMA_WARMUP_KEEP_ALIVE`` so it is
+        still loaded however long that takes; the QA model's own requests then
+        restore Ollama's default idle timeout.
+        """
+
+        url = f"{self.config.ollama_base_url.rstrip('/')}/api/generate"
+        model = self.config.ollama_model
+
+        def worker() -> None:
+            try:
+                # A request without a prompt makes Ollama load the model into
+                # memory without generating anything.
+                payload = {"model": model, "keep_alive": OLLAMA_WARMUP_KEEP_ALIVE}
+                httpx.post(url, json=payload, timeout=120.0).raise_for_status()
+            except Exception as exc:  # pragma: no cover - depends on local Ollama
+                LOGGER.debug("Ollama warm-up for %s failed: %s", model, exc)
+
+        threading.Thread(target=worker, daemon=True).start()
 
     def _build_source(self, document: Document):
         instruction = f"Source: {document.name}"
@@ -434,18 +769,29 @@ class GraphRAGService:
         except Exception as exc:  # pragma: no cover - depends on model behaviour
             raise GraphRAGConfigurationError(f"Failed to build ontology: {exc}") from exc
 
-        data = json.dumps(ontology.to_json(), indent=2)
-        self.config.ontology_path.write_text(data, encoding="utf-8")
+        if self._ontology is not None and self._documents:
+            # Incremental ingests only extract from the new documents, so keep
+            # the entity and relation types found in the earlier ones.
+            ontology = self._ontology.merge_with(ontology)
+
+        data = _dump_json(ontology.to_json())
+        digest = _fingerprint(data)
+        if digest != self._ontology_digest:
+            self.config.ontology_path.write_bytes(data)
+            self._ontology_digest = digest
+        else:
+            LOGGER.debug("Ontology unchanged; skipping write to %s", self.config.ontology_path)
         return ontology
 
     def _load_existing_ontology(self) -> Optional[Ontology]:
         if not self.config.ontology_path.exists():
             return None
         try:
-            raw = self.config.ontology_path.read_text(encoding="utf-8")
+            raw = self.config.ontology_path.read_bytes()
             if not raw.strip():
                 return None
-            payload = json.loads(raw)
+            payload = _load_json(raw)
+            self._ontology_digest = _fingerprint(raw)
             return Ontology.from_json(payload)
         except Exception as exc:  # pragma: no cover - defensive
             LOGGER.warning("Failed to load ontology from %s: %s", self.config.ontology_path, exc)
@@ -453,6 +799,7 @@ class GraphRAGService:
 
 
 __all__ = [
+    "ChatEngine",
     "Document",
     "GraphRAGConfig",
     "GraphRAGConfigurationError",
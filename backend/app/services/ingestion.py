@@ -1,16 +1,34 @@
 """Utilities for ingesting content from the data directories."""
 from __future__ import annotations
 
+import asyncio
+import functools
 import hashlib
-import json
 import logging
+import multiprocessing
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from typing import List
+from typing import BinaryIO, Dict, List, Optional, Tuple
 
-from .graphrag import Document
+import httpx
+
+from .extraction import HAS_PDFIUM, HASH_ALGORITHM, _content_hash, _read_local_file
+from .graphrag import Document, _dump_json, _load_json
 
 LOGGER = logging.getLogger(__name__)
 
+UPLOAD_CHUNK_SIZE = 1 << 20
+# Below this many local files the thread pool costs more than it saves.
+PARALLEL_READ_THRESHOLD = 4
+MAX_READ_WORKERS = 8
+URL_FETCH_CONCURRENCY = 16
+URL_FETCH_TIMEOUT = 10.0
+# Spawning worker processes costs a few hundred milliseconds, so the pool is
+# only used for batches large enough to amortise it.
+PARALLEL_PDF_THRESHOLD = 16
+
 
 class DataDirectoryIngestor:
     """Ingest documents from the repo's data directories."""
@@ -20,121 +38,261 @@ class DataDirectoryIngestor:
         self.pdf_dir = base_path / "data" / "pdf"
         self.txt_dir = base_path / "data" / "txt"
         self.url_dir = base_path / "data" / "url"
-        self.pdf_dir.mkdir(parents=True, exist_ok=True)
-        self.txt_dir.mkdir(parents=True, exist_ok=True)
-        self.url_dir.mkdir(parents=True, exist_ok=True)
+        self.url_cache_path = self.url_dir / "url_cache.json"
+        self.url_cache_dir = self.url_dir / "cached"
+        # Local documents keyed by the (path, mtime_ns, size) of every scanned file.
+        self._local_cache: Optional[Tuple[tuple, List[Document]]] = None
+        # Directories are created on first use so constructing an ingestor
+        # never touches the filesystem.
+        self._dirs_ready = False
+
+    def _ensure_dirs(self) -> None:
+        if self._dirs_ready:
+            return
+        for directory in (self.pdf_dir, self.txt_dir, self.url_dir):
+            directory.mkdir(parents=True, exist_ok=True)
+        self._dirs_ready = True
 
-    def persist_upload(self, filename: str, data: bytes) -> Path:
+    def stream_upload(self, filename: str, source: BinaryIO) -> Path:
+        """Copy an upload to disk in fixed-size chunks to bound peak memory."""
+
+        self._ensure_dirs()
         suffix = Path(filename).suffix.lower()
         if suffix == ".pdf":
             target_dir = self.pdf_dir
         else:
             target_dir = self.txt_dir
         target_path = target_dir / filename
-        target_path.write_bytes(data)
+        with target_path.open("wb") as target:
+            shutil.copyfileobj(source, target, length=UPLOAD_CHUNK_SIZE)
         LOGGER.info("Stored upload at %s", target_path)
         return target_path
 
-    def _read_pdf(self, path: Path) -> str:
-        try:
-            from pypdf import PdfReader  # type: ignore
-        except Exception:  # pragma: no cover - optional dependency
-            LOGGER.warning("pypdf not available, returning placeholder text for %s", path)
-            return f"PDF document at {path.name}"
-
-        content = []
-        with path.open("rb") as pdf_file:
-            reader = PdfReader(pdf_file)
-            for page in reader.pages:
-                try:
-                    page_text = page.extract_text() or ""
-                except Exception:  # pragma: no cover - defensive
-                    page_text = ""
-                content.append(page_text)
-        return "\n".join(content).strip()
-
-    def _read_text(self, path: Path) -> str:
-        return path.read_text(encoding="utf-8")
-
     def _read_url_manifest(self, path: Path) -> List[str]:
         raw = path.read_text(encoding="utf-8").strip()
         if not raw:
             return []
-        try:
-            data = json.loads(raw)
+        # Only a JSON array is a valid manifest, so plain newline-separated
+        # files skip the parser (and its exception) entirely.
+        if raw[:1] == "[":
+            try:
+                data = _load_json(raw)
+            except ValueError:
+                data = None
             if isinstance(data, list):
                 return [str(item) for item in data]
-        except json.JSONDecodeError:
-            pass
         return [line.strip() for line in raw.splitlines() if line.strip()]
 
+    def _load_url_cache(self) -> Dict[str, Dict[str, str]]:
+        if not self.url_cache_path.exists():
+            return {}
+        try:
+            data = _load_json(self.url_cache_path.read_bytes())
+        except (OSError, ValueError) as exc:
+            LOGGER.warning("Ignoring unreadable URL cache %s: %s", self.url_cache_path, exc)
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def _cached_body_path(self, digest: str) -> Path:
+        return self.url_cache_dir / f"{digest}.txt"
+
+    def _reusable_body(self, entry: Optional[Dict[str, str]]) -> Optional[Path]:
+        """Path of a cached body that can stand in for a fresh download, if any.
+
+        Entries hashed with another algorithm (``blake3`` installed or removed
+        since they were cached) count as misses, so document hashes always
+        match their ``hash_algorithm`` label.
+        """
+
+        if not entry or not entry.get("hash") or entry.get("hash_algorithm") != HASH_ALGORITHM:
+            return None
+        path = self._cached_body_path(entry["hash"])
+        return path if path.exists() else None
+
+    def _conditional_headers(self, entry: Optional[Dict[str, str]]) -> Dict[str, str]:
+        """Revalidation headers for a cached URL whose body can be reused."""
+
+        if self._reusable_body(entry) is None:
+            return {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
     def _fetch_remote_documents(self) -> List[Document]:
-        """Load documents defined in URL manifests."""
+        """Load documents defined in URL manifests.
 
-        documents: List[Document] = []
-        try:
-            import httpx  # type: ignore
-        except Exception:  # pragma: no cover - optional dependency
-            LOGGER.warning("httpx not available, skipping URL ingestion")
-            return documents
+        Bodies are cached under ``data/url/cached`` and revalidated with
+        conditional requests, so unchanged pages are not downloaded again. Runs
+        its own event loop, so it must be called from synchronous code (the
+        ingest endpoint calls ``collect_documents`` from a worker thread).
+        """
 
+        targets: List[tuple[str, str, str]] = []
+        seen: set[str] = set()
         for manifest in sorted(self.url_dir.glob("*.txt")):
             urls = self._read_url_manifest(manifest)
             for index, url in enumerate(urls, start=1):
+                # The same link listed in several manifests is fetched once.
+                if url in seen:
+                    continue
+                seen.add(url)
                 doc_id = hashlib.sha1(url.encode("utf-8")).hexdigest()[:8]
-                name = f"{manifest.stem}_{index}_{doc_id}.url"
-                metadata = {"source": "url", "url": url, "manifest": manifest.name}
-                try:
-                    response = httpx.get(url, timeout=10.0, follow_redirects=True)
-                    response.raise_for_status()
-                    content = response.text
-                    metadata["status"] = str(response.status_code)
-                except Exception as exc:  # pragma: no cover - network failure path
-                    LOGGER.warning("Failed to fetch %s: %s", url, exc)
-                    content = ""
-                    metadata["status"] = "error"
-                    metadata["error"] = str(exc)
+                targets.append((f"{manifest.stem}_{index}_{doc_id}.url", url, manifest.name))
 
-                if content.strip():
-                    metadata["sha1"] = hashlib.sha1(content.encode("utf-8")).hexdigest()
-                    documents.append(Document(name=name, content=content, metadata=metadata))
+        if not targets:
+            # No manifest lists a URL any more, so forget everything cached.
+            if self._load_url_cache():
+                self._save_url_cache({})
+            return []
+        return asyncio.run(self._fetch_targets(targets))
 
-        return documents
+    async def _fetch_targets(self, targets: List[tuple[str, str, str]]) -> List[Document]:
+        """Fetch ``(name, url, manifest)`` targets concurrently, preserving their order."""
+
+        cache = self._load_url_cache()
+        semaphore = asyncio.Semaphore(URL_FETCH_CONCURRENCY)
+
+        async with httpx.AsyncClient(timeout=URL_FETCH_TIMEOUT, follow_redirects=True) as client:
+
+            async def fetch(url: str):
+                async with semaphore:
+                    response = await client.get(url, headers=self._conditional_headers(cache.get(url)))
+                    if response.status_code != 304:  # httpx treats Not Modified as an error
+                        response.raise_for_status()
+                    return response
+
+            results = await asyncio.gather(*(fetch(url) for _, url, _ in targets), return_exceptions=True)
 
-    def collect_documents(self) -> List[Document]:
         documents: List[Document] = []
+        cache_changed = False
+        for (name, url, manifest_name), result in zip(targets, results):
+            entry = cache.get(url)
+            cached_path = self._reusable_body(entry)
+            failed = isinstance(result, BaseException)
+            if failed:
+                # Keep serving the last good copy, so one network error does not
+                # drop the document and force the graph to be rebuilt.
+                if cached_path is None:
+                    LOGGER.warning("Failed to fetch %s: %s", url, result)
+                    continue
+                LOGGER.warning("Failed to fetch %s (%s); using the cached copy", url, result)
 
-        if self.pdf_dir.exists():
-            for pdf in sorted(self.pdf_dir.glob("*.pdf")):
-                content = self._read_pdf(pdf)
-                if content.strip():
-                    documents.append(
-                        Document(
-                            name=pdf.name,
-                            content=content,
-                            metadata={
-                                "source": "pdf",
-                                "sha1": hashlib.sha1(content.encode("utf-8")).hexdigest(),
-                                "path": str(pdf),
-                            },
-                        )
-                    )
+            if failed or (result.status_code == 304 and cached_path is not None):
+                digest = entry["hash"]
+                body = cached_path.read_bytes()
+                encoding = entry.get("encoding") or "utf-8"
+                status = entry.get("status") or "200"
+            else:
+                body = result.content
+                digest = _content_hash(body)
+                encoding = result.encoding or "utf-8"
+                body_path = self._cached_body_path(digest)
+                if not body_path.exists():
+                    self.url_cache_dir.mkdir(parents=True, exist_ok=True)
+                    body_path.write_bytes(body)
+                cache[url] = {
+                    "hash": digest,
+                    "hash_algorithm": HASH_ALGORITHM,
+                    "status": str(result.status_code),
+                    "encoding": encoding,
+                    "etag": result.headers.get("etag", ""),
+                    "last_modified": result.headers.get("last-modified", ""),
+                }
+                cache_changed = cache_changed or cache[url] != entry
+                status = str(result.status_code)
+
+            content = body.decode(encoding, errors="replace")
+            metadata = {"source": "url", "url": url, "manifest": manifest_name, "status": status}
+            if content.strip():
+                metadata["hash"] = digest
+                metadata["hash_algorithm"] = HASH_ALGORITHM
+                documents.append(Document(name=name, content=content, metadata=metadata))
 
-        if self.txt_dir.exists():
-            for txt in sorted(self.txt_dir.glob("*.txt")):
-                content = self._read_text(txt)
+        # Forget URLs that no manifest lists any more.
+        stale = cache.keys() - {url for _, url, _ in targets}
+        for url in stale:
+            del cache[url]
+
+        if cache_changed or stale:
+            self._save_url_cache(cache)
+        return documents
+
+    def _save_url_cache(self, cache: Dict[str, Dict[str, str]]) -> None:
+        self.url_cache_path.write_bytes(_dump_json(cache))
+        # Drop bodies no cached URL points at any more.
+        live = {entry.get("hash") for entry in cache.values()}
+        if self.url_cache_dir.exists():
+            for body_path in self.url_cache_dir.glob("*.txt"):
+                if body_path.stem not in live:
+                    body_path.unlink(missing_ok=True)
+
+    def _read_local_files(self, paths: List[Path], source: str) -> List[tuple[str, str]]:
+        """Read ``paths`` into ``(content, hash)`` pairs, in order, using a pool when worthwhile."""
+
+        reader = functools.partial(_read_local_file, source=source)
+        if source == "pdf":
+            # PDFium parses a typical PDF in milliseconds of native code, well
+            # under the cost of spawning a worker, and is not thread-safe, so
+            # it always runs serially. Only the pure-Python pypdf fallback
+            # uses worker processes, and only for batches big enough to pay
+            # for spawning them. Spawn rather than fork: ingest runs inside a
+            # threaded server.
+            workers = min(os.cpu_count() or 1, len(paths))
+            if not HAS_PDFIUM and len(paths) > PARALLEL_PDF_THRESHOLD and workers > 1:
+                with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+                    return list(executor.map(reader, paths))
+            return [reader(path) for path in paths]
+        if len(paths) > PARALLEL_READ_THRESHOLD:
+            # File reads and hashing release the GIL, so threads overlap the I/O.
+            with ThreadPoolExecutor(max_workers=min(MAX_READ_WORKERS, len(paths))) as executor:
+                return list(executor.map(reader, paths))
+        return [reader(path) for path in paths]
+
+    def _scan_local_files(self) -> List[Tuple[str, List[Path]]]:
+        scanned = []
+        for source, directory, pattern in (("pdf", self.pdf_dir, "*.pdf"), ("txt", self.txt_dir, "*.txt")):
+            if directory.exists():
+                scanned.append((source, sorted(directory.glob(pattern))))
+        return scanned
+
+    def _collect_local_documents(self) -> List[Document]:
+        scanned = self._scan_local_files()
+        entries = []
+        for _, paths in scanned:
+            for path in paths:
+                stat = path.stat()
+                entries.append((str(path), stat.st_mtime_ns, stat.st_size))
+        fingerprint = tuple(entries)
+        if self._local_cache is not None and self._local_cache[0] == fingerprint:
+            return list(self._local_cache[1])
+
+        documents: List[Document] = []
+        for source, paths in scanned:
+            for path, (content, digest) in zip(paths, self._read_local_files(paths, source)):
                 if content.strip():
                     documents.append(
                         Document(
-                            name=txt.name,
+                            name=path.name,
                             content=content,
                             metadata={
-                                "source": "txt",
-                                "sha1": hashlib.sha1(content.encode("utf-8")).hexdigest(),
-                                "path": str(txt),
+                                "source": source,
+                                "hash": digest,
+                                "hash_algorithm": HASH_ALGORITHM,
+                                "path": str(path),
                             },
                         )
                     )
+        self._local_cache = (fingerprint, documents)
+        return list(documents)
+
+    def collect_documents(self) -> List[Document]:
+        # Unchanged PDFs and text files are served from memory; URLs are always
+        # revalidated, which is already cheap thanks to the conditional-GET cache.
+        self._ensure_dirs()
+        documents = self._collect_local_documents()
 
         if self.url_dir.exists():
             documents.extend(self._fetch_remote_documents())
@@ -172,8 +172,10 @@ const App: React.FC = () => {
                 {doc.metadata?.path && (
                   <span className="block text-xs text-surface/60">{doc.metadata.path}</span>
                 )}
-                {doc.metadata?.sha1 && (
-                  <span className="block text-xs text-surface/50">hash: {doc.metadata.sha1}</span>
+                {doc.metadata?.hash && (
+                  <span className="block text-xs text-surface/50">
+                    {doc.metadata.hash_algorithm ?? 'hash'}: {doc.metadata.hash}
+                  </span>
                 )}
               </li>
             ))}
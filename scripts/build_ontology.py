@@ -5,8 +5,6 @@ import json
 import sys
 from pathlib import Path
 
-from dotenv import load_dotenv
-
 try:
     from graphrag_sdk import Ontology
     from graphrag_sdk.models.litellm import LiteModel
@@ -21,10 +19,7 @@ from backend.app.services.ingestion import DataDirectoryIngestor
 
 def main() -> int:
     base_path = Path(__file__).resolve().parents[1]
-
-    load_dotenv(base_path / ".env", override=True)
-    load_dotenv(override=True)
-
+    # Same .env handling and precedence as the server.
     config = GraphRAGConfig.from_env(base_path)
 
     ingestor = DataDirectoryIngestor(base_path)
@@ -35,10 +35,47 @@ def test_ingest_and_chat_streaming(client: TestClient):
 
     with client.stream("POST", "/chat/stream", json={"prompt": "Hello"}) as stream:
         chunks = list(stream.iter_text())
+        assert stream.headers["x-accel-buffering"] == "no"
     assert any("Hello" in chunk for chunk in chunks)
     assert any("sample.txt" in chunk or "Sample" in chunk for chunk in chunks)
 
 
+def test_stream_rejects_missing_prompt(client: TestClient):
+    response = client.post("/chat/stream", json={"message": "Hello"})
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body", "prompt"]
+
+
+def test_stream_rejects_empty_and_undecodable_bodies(client: TestClient):
+    empty = client.post("/chat/stream", content=b"", headers={"Content-Type": "application/json"})
+    assert empty.status_code == 422
+    assert empty.json()["detail"][0]["type"] == "missing"
+    assert empty.json()["detail"][0]["loc"] == ["body"]
+
+    undecodable = client.post("/chat/stream", content=b"\xff\xfe{", headers={"Content-Type": "application/json"})
+    assert undecodable.status_code == 400
+
+
+def test_stream_requires_a_json_body(client: TestClient):
+    response = client.post("/chat/stream", content=b'{"prompt": "Hello"}', headers={"Content-Type": "text/plain"})
+    assert response.status_code == 422
+
+    operation = client.get("/openapi.json").json()["paths"]["/chat/stream"]["post"]
+    schema = operation["requestBody"]["content"]["application/json"]["schema"]
+    assert schema == {"$ref": "#/components/schemas/ChatRequest"}
+    assert "422" in operation["responses"]
+
+
+def test_ingest_drops_documents_removed_from_disk(client: TestClient, tmp_path):
+    extra = tmp_path / "data" / "txt" / "extra.txt"
+    extra.write_text("Extra notes", encoding="utf-8")
+    assert client.post("/chat/ingest").json()["document_names"] == ["extra.txt", "sample.txt"]
+
+    extra.unlink()
+    assert client.post("/chat/ingest").json()["document_names"] == ["sample.txt"]
+    assert [doc["name"] for doc in client.get("/chat/documents").json()["documents"]] == ["sample.txt"]
+
+
 def test_upload_and_list_documents(client: TestClient, tmp_path):
     upload_response = client.post("/chat/upload", files={"file": ("upload.txt", b"Uploaded content", "text/plain")})
     assert upload_response.status_code == 200
@@ -57,3 +94,11 @@ def test_upload_and_list_documents(client: TestClient, tmp_path):
     docs = documents_response.json()
     assert docs["using_stub"] is True
     assert any(doc["name"] == "upload.txt" for doc in docs["documents"])
+
+
+def test_repeated_ingest_does_not_duplicate_documents(client: TestClient):
+    for _ in range(3):
+        assert client.post("/chat/ingest").status_code == 200
+
+    names = [doc["name"] for doc in client.get("/chat/documents").json()["documents"]]
+    assert names == ["sample.txt"]
@@ -0,0 +1,287 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from backend.app.services import graphrag
+from backend.app.services.graphrag import (
+    Document,
+    GraphRAGConfig,
+    GraphRAGService,
+    StubGraphRAGChatEngine,
+)
+
+
+def _collect(engine, prompt: str) -> str:
+    async def consume() -> str:
+        return b"".join([chunk async for chunk in engine.stream_chat(prompt)]).decode("utf-8")
+
+    return asyncio.run(consume())
+
+
+def test_ranks_documents_by_token_overlap():
+    engine = StubGraphRAGChatEngine()
+    engine.ingest(
+        [
+            Document(name="network.txt", content="Network policies restrict pod traffic."),
+            Document(name="storage.txt", content="Persistent volumes store pod data."),
+        ]
+    )
+
+    answer = _collect(engine, "Which network policies apply?")
+
+    assert "network.txt (score 2)" in answer
+    assert "storage.txt" not in answer
+
+
+def test_reingest_replaces_indexed_tokens():
+    engine = StubGraphRAGChatEngine()
+    engine.ingest([Document(name="notes.txt", content="alpha")])
+    engine.ingest([Document(name="notes.txt", content="beta")])
+
+    assert "No direct match" in _collect(engine, "alpha")
+    assert "notes.txt (score 1)" in _collect(engine, "beta")
+
+
+def test_document_listing_is_refreshed_after_ingest_and_reset():
+    engine = StubGraphRAGChatEngine()
+
+    def listed_names():
+        return [doc["name"] for doc in json.loads(engine.document_listing())["documents"]]
+
+    engine.ingest([Document(name="first.txt", content="one", metadata={"source": "txt"})])
+    assert listed_names() == ["first.txt"]
+    assert engine.document_listing() is engine.document_listing()
+
+    engine.ingest([Document(name="second.txt", content="two")])
+    assert listed_names() == ["first.txt", "second.txt"]
+    assert json.loads(engine.document_listing())["documents"][0]["metadata"] == {"source": "txt"}
+
+    engine.reset()
+    assert listed_names() == []
+
+
+def test_scores_weight_term_frequency():
+    engine = StubGraphRAGChatEngine()
+    engine.ingest(
+        [
+            Document(name="once.txt", content="ingress rules"),
+            Document(name="twice.txt", content="ingress and more ingress"),
+        ]
+    )
+
+    answer = _collect(engine, "ingress")
+
+    assert answer.index("twice.txt (score 2)") < answer.index("once.txt (score 1)")
+
+
+def test_prompt_tokens_match_indexed_prefixes():
+    engine = StubGraphRAGChatEngine()
+    engine.ingest([Document(name="sample.txt", content="Sample knowledge base")])
+
+    assert "sample.txt (score 1)" in _collect(engine, "Sampl")
+    assert "No direct match" in _collect(engine, "Sa")
+
+
+def test_terms_reached_by_several_prompt_tokens_count_once():
+    engine = StubGraphRAGChatEngine()
+    engine.ingest([Document(name="pods.txt", content="pods")])
+
+    assert "pods.txt (score 1)" in _collect(engine, "pod pods")
+
+
+def test_highlights_skip_terms_removed_by_a_concurrent_ingest():
+    engine = StubGraphRAGChatEngine()
+    engine.ingest([Document(name="pods.txt", content="pods and services")])
+    # Simulate an ingest on another thread dropping a posting list between
+    # the trie lookup and scoring.
+    del engine._postings["pods"]
+
+    assert "No direct match" in _collect(engine, "pods")
+    assert "pods.txt (score 1)" in _collect(engine, "pods services")
+
+
+class _FakeOntology:
+    def __init__(self, sources=()):
+        self.sources = list(sources)
+
+    @classmethod
+    def from_sources(cls, sources, model, hide_progress):
+        return cls(sources)
+
+    def merge_with(self, other):
+        self.sources.extend(source for source in other.sources if source not in self.sources)
+        return self
+
+    def to_json(self):
+        return {"entities": self.sources, "relations": []}
+
+
+class _FakeChatSession:
+    def __init__(self):
+        self.messages = []
+
+    def send_message_stream(self, message):
+        self.messages.append(message)
+        yield f"answer {len(self.messages)}"
+
+
+class _FakeKnowledgeGraph:
+    def __init__(self, *, ontology, **kwargs):
+        self.ontology = ontology
+        self.processed = []
+        self.deleted = False
+
+    def process_sources(self, sources, hide_progress):
+        self.processed.extend(sources)
+
+    def chat_session(self):
+        return _FakeChatSession()
+
+    def delete(self):
+        self.deleted = True
+
+
+# Kept before the fixture below replaces it with a no-op.
+_warm_qa_model = GraphRAGService._warm_qa_model
+
+
+@pytest.fixture()
+def fake_service(tmp_path, monkeypatch):
+    """A real-backend GraphRAGService wired to in-memory fakes instead of graphrag_sdk."""
+
+    monkeypatch.setattr(graphrag, "HAS_GRAPH_BACKEND", True)
+    monkeypatch.setattr(graphrag, "KnowledgeGraph", _FakeKnowledgeGraph)
+    monkeypatch.setattr(graphrag, "Ontology", _FakeOntology)
+    monkeypatch.setattr(graphrag, "Source_FromRawText", lambda content, instruction: content)
+
+    def initialise(self):
+        self._model_config = SimpleNamespace(extract_data=None)
+        self._knowledge_graph = None
+        self._ontology = None
+        self._chat_session = None
+        self._documents.clear()
+        self._ingested_digests.clear()
+
+    monkeypatch.setattr(GraphRAGService, "_initialise_real_backend", initialise)
+    monkeypatch.setattr(GraphRAGService, "_warm_qa_model", lambda self: None)
+    config = GraphRAGConfig(
+        base_path=tmp_path,
+        kg_name="test",
+        ontology_path=tmp_path / "ontology.json",
+        extraction_model="test",
+        cypher_model=None,
+        ollama_model="test",
+        ollama_base_url="http://localhost:11434",
+        falkordb_host="localhost",
+        falkordb_port=6379,
+        falkordb_username=None,
+        falkordb_password=None,
+        auto_refresh_ontology=True,
+        reset_before_ingest=False,
+        force_stub=False,
+    )
+    return GraphRAGService(config)
+
+
+def test_service_ingests_identical_content_under_each_name(fake_service):
+    original = Document(name="a.txt", content="same text", metadata={"hash": "h1"})
+    copy = Document(name="b.txt", content="same text", metadata={"hash": "h1"})
+
+    fake_service.ingest([original])
+    summary = fake_service.ingest([original, copy])
+
+    assert summary["documents_ingested"] == 2
+    assert summary["documents_added"] == 1
+    assert summary["document_names"] == ["a.txt", "b.txt"]
+    assert [doc.name for doc in fake_service.get_documents()] == ["a.txt", "b.txt"]
+    assert fake_service._knowledge_graph.processed == ["same text", "same text"]
+
+
+def test_service_rebuilds_graph_when_a_document_changes(fake_service):
+    fake_service.ingest([Document(name="a.txt", content="old text", metadata={"hash": "h1"})])
+    first_graph = fake_service._knowledge_graph
+
+    summary = fake_service.ingest([Document(name="a.txt", content="new text", metadata={"hash": "h2"})])
+
+    assert summary["documents_added"] == 1
+    assert fake_service._knowledge_graph is not first_graph
+    assert fake_service._knowledge_graph.processed == ["new text"]
+
+
+def test_service_keeps_chat_session_when_ontology_is_unchanged(fake_service):
+    documents = [Document(name=f"doc_{index}.txt", content=f"text {index}") for index in range(10)]
+    fake_service.ingest(documents)
+    session = fake_service._chat_session
+
+    summary = fake_service.ingest(documents + [Document(name="extra.txt", content="more text")])
+
+    assert summary["documents_added"] == 1
+    assert summary["ontology_refreshed"] is False
+    assert fake_service._chat_session is session
+
+
+def test_service_ontology_refresh_keeps_earlier_documents(fake_service):
+    fake_service.ingest([Document(name=f"doc_{index}.txt", content=f"text {index}") for index in range(10)])
+
+    summary = fake_service.ingest([Document(name=f"new_{index}.txt", content=f"new {index}") for index in range(3)])
+
+    expected = [f"text {index}" for index in range(10)] + [f"new {index}" for index in range(3)]
+    assert summary["ontology_refreshed"] is True
+    assert fake_service._knowledge_graph.ontology.sources == expected
+    assert json.loads(fake_service.config.ontology_path.read_text())["entities"] == expected
+
+
+def test_service_resets_graph_left_by_an_earlier_process(fake_service, monkeypatch):
+    persisted = _FakeKnowledgeGraph(ontology=_FakeOntology())
+    initialise = GraphRAGService._initialise_real_backend
+
+    def connect_to_persisted_graph(self):
+        initialise(self)
+        if not persisted.deleted:
+            self._knowledge_graph = persisted
+            self._ontology = persisted.ontology
+
+    monkeypatch.setattr(GraphRAGService, "_initialise_real_backend", connect_to_persisted_graph)
+    service = GraphRAGService(fake_service.config)
+
+    service.ingest([Document(name="a.txt", content="text")])
+    assert persisted.deleted
+    assert service._knowledge_graph is not persisted
+
+    rebuilt = service._knowledge_graph
+    service.ingest([Document(name="a.txt", content="text"), Document(name="b.txt", content="more")])
+    assert service._knowledge_graph is rebuilt
+    assert rebuilt.processed == ["text", "more"]
+
+
+def test_service_sends_repeated_follow_ups_to_the_session(fake_service):
+    fake_service.ingest([Document(name="a.txt", content="text")])
+
+    answers = [_collect(fake_service, prompt) for prompt in ("What is a pod?", "Why?", "What is a pod?", "Why?")]
+
+    assert answers == ["answer 1", "answer 2", "answer 3", "answer 4"]
+    assert fake_service._chat_session.messages == ["What is a pod?", "Why?", "What is a pod?", "Why?"]
+
+
+def test_service_warms_the_ollama_model_without_a_prompt(fake_service, monkeypatch):
+    posted = []
+    done = threading.Event()
+
+    def post(url, json, timeout):
+        posted.append((url, json))
+        done.set()
+        return SimpleNamespace(raise_for_status=lambda: None)
+
+    monkeypatch.setattr(graphrag.httpx, "post", post)
+
+    _warm_qa_model(fake_service)
+
+    assert done.wait(timeout=5)
+    assert posted == [
+        ("http://localhost:11434/api/generate", {"model": "test", "keep_alive": graphrag.OLLAMA_WARMUP_KEEP_ALIVE})
+    ]
@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import functools
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from backend.app.services.ingestion import HASH_ALGORITHM, DataDirectoryIngestor, _content_hash
+
+
+def _make_ingestor(tmp_path) -> DataDirectoryIngestor:
+    for name in ("pdf", "txt", "url"):
+        (tmp_path / "data" / name).mkdir(parents=True, exist_ok=True)
+    return DataDirectoryIngestor(base_path=tmp_path)
+
+
+def test_collect_documents_preserves_order_when_reading_in_parallel(tmp_path):
+    ingestor = _make_ingestor(tmp_path)
+    for index in range(6):
+        (ingestor.txt_dir / f"doc_{index}.txt").write_text(f"Document {index}", encoding="utf-8")
+    (ingestor.txt_dir / "empty.txt").write_text("   ", encoding="utf-8")
+
+    documents = ingestor.collect_documents()
+
+    assert [doc.name for doc in documents] == [f"doc_{index}.txt" for index in range(6)]
+    assert all(doc.metadata["source"] == "txt" for doc in documents)
+
+
+def test_text_documents_hash_raw_file_bytes(tmp_path):
+    ingestor = _make_ingestor(tmp_path)
+    path = ingestor.txt_dir / "windows.txt"
+    path.write_bytes(b"line one\r\nline two\r\n")
+
+    (document,) = ingestor.collect_documents()
+
+    assert document.content == "line one\nline two\n"
+    assert document.metadata["hash"] == _content_hash(path.read_bytes())
+
+
+def test_url_documents_are_revalidated_from_the_cache(tmp_path, monkeypatch):
+    httpx = pytest.importorskip("httpx")
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, text="Remote page", headers={"ETag": '"v1"'})
+
+    transport = httpx.MockTransport(handler)
+    monkeypatch.setattr(httpx, "AsyncClient", functools.partial(httpx.AsyncClient, transport=transport))
+
+    ingestor = _make_ingestor(tmp_path)
+    (ingestor.url_dir / "a.txt").write_text("https://example.com/page", encoding="utf-8")
+    (ingestor.url_dir / "b.txt").write_text('["https://example.com/page"]', encoding="utf-8")
+
+    first = ingestor.collect_documents()
+    second = ingestor.collect_documents()
+
+    assert len(requests) == 2
+    assert "If-None-Match" not in requests[0].headers
+    assert requests[1].headers["If-None-Match"] == '"v1"'
+    assert [doc.content for doc in first] == [doc.content for doc in second] == ["Remote page"]
+    assert second[0].metadata["status"] == "200"
+    assert second[0].metadata["hash"] == first[0].metadata["hash"]
+
+
+def test_url_documents_fall_back_to_the_cache_when_a_fetch_fails(tmp_path, monkeypatch):
+    httpx = pytest.importorskip("httpx")
+    responses = [httpx.Response(200, text="Remote page"), httpx.ConnectError("offline")]
+
+    def handler(request):
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    transport = httpx.MockTransport(handler)
+    monkeypatch.setattr(httpx, "AsyncClient", functools.partial(httpx.AsyncClient, transport=transport))
+
+    ingestor = _make_ingestor(tmp_path)
+    (ingestor.url_dir / "a.txt").write_text("https://example.com/page", encoding="utf-8")
+
+    first = ingestor.collect_documents()
+    second = ingestor.collect_documents()
+
+    assert [doc.content for doc in second] == ["Remote page"]
+    assert second[0].metadata == first[0].metadata
+
+
+def test_url_cache_entries_from_another_hash_algorithm_are_refetched(tmp_path, monkeypatch):
+    httpx = pytest.importorskip("httpx")
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, text="Remote page", headers={"ETag": '"v1"'})
+
+    transport = httpx.MockTransport(handler)
+    monkeypatch.setattr(httpx, "AsyncClient", functools.partial(httpx.AsyncClient, transport=transport))
+
+    ingestor = _make_ingestor(tmp_path)
+    (ingestor.url_dir / "a.txt").write_text("https://example.com/page", encoding="utf-8")
+    ingestor.collect_documents()
+    cache = json.loads(ingestor.url_cache_path.read_text(encoding="utf-8"))
+    assert cache["https://example.com/page"]["hash_algorithm"] == HASH_ALGORITHM
+    cache["https://example.com/page"]["hash_algorithm"] = "other"
+    ingestor.url_cache_path.write_text(json.dumps(cache), encoding="utf-8")
+
+    (document,) = ingestor.collect_documents()
+
+    assert "If-None-Match" not in requests[1].headers
+    assert document.metadata["hash_algorithm"] == HASH_ALGORITHM
+    assert document.metadata["hash"] == _content_hash(b"Remote page")
+
+
+def test_url_cache_is_pruned_when_no_urls_are_listed(tmp_path, monkeypatch):
+    httpx = pytest.importorskip("httpx")
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, text="Remote page"))
+    monkeypatch.setattr(httpx, "AsyncClient", functools.partial(httpx.AsyncClient, transport=transport))
+
+    ingestor = _make_ingestor(tmp_path)
+    manifest = ingestor.url_dir / "a.txt"
+    manifest.write_text("https://example.com/page", encoding="utf-8")
+    assert len(ingestor.collect_documents()) == 1
+    assert list(ingestor.url_cache_dir.glob("*.txt"))
+
+    manifest.write_text("", encoding="utf-8")
+
+    assert ingestor.collect_documents() == []
+    assert json.loads(ingestor.url_cache_path.read_text(encoding="utf-8")) == {}
+    assert not list(ingestor.url_cache_dir.glob("*.txt"))
+
+
+def test_collect_documents_reuses_unchanged_local_files(tmp_path, monkeypatch):
+    ingestor = _make_ingestor(tmp_path)
+    path = ingestor.txt_dir / "notes.txt"
+    path.write_text("first", encoding="utf-8")
+    reads = []
+    original = ingestor._read_local_files
+
+    def counting_read(paths, source):
+        reads.extend(paths)
+        return original(paths, source)
+
+    monkeypatch.setattr(ingestor, "_read_local_files", counting_read)
+
+    assert [doc.content for doc in ingestor.collect_documents()] == ["first"]
+    assert [doc.content for doc in ingestor.collect_documents()] == ["first"]
+    assert len(reads) == 1
+
+    path.write_text("second version", encoding="utf-8")
+
+    assert [doc.content for doc in ingestor.collect_documents()] == ["second version"]
+    assert len(reads) == 2
+
+
+def test_data_directories_are_created_on_first_use(tmp_path):
+    ingestor = DataDirectoryIngestor(base_path=tmp_path)
+    assert not (tmp_path / "data").exists()
+
+    assert ingestor.collect_documents() == []
+    assert ingestor.pdf_dir.is_dir() and ingestor.txt_dir.is_dir() and ingestor.url_dir.is_dir()
+
+
+def test_pdf_worker_module_does_not_import_graphrag():
+    # Spawned PDF workers import this module; it must stay free of graphrag_sdk.
+    code = (
+        "import sys, backend.app.services.extraction; "
+        "assert 'backend.app.services.graphrag' not in sys.modules"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True, cwd=Path(__file__).resolve().parents[2])